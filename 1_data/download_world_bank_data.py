@@ -1,7 +1,24 @@
 import wbgapi as wb
 import pandas as pd
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
+
+def fetch_indicator(indicator_code, indicator_name, country_code):
+    """
+    Downloads a single World Bank indicator as a one-column DataFrame indexed by year.
+    """
+    print(f"Downloading data for: {indicator_name} ({indicator_code})")
+
+    # wbgapi returns the wide layout directly: one row per year, one column for the indicator
+    df = wb.data.DataFrame(
+        indicator_code,
+        country_code,
+        time=range(2000, 2025),
+        index='time',
+        columns='series',
+        numericTimeKeys=True
+    )
+    return df.rename(columns={indicator_code: indicator_name})
 
 def download_world_bank_data():
     """
@@ -28,51 +45,32 @@ def download_world_bank_data():
     
     country_code = 'NGA'
     
-    # Store the downloaded data in a list of dictionaries
-    data_list = []
-    
     try:
-        # Loop through each indicator and download the data
-        for indicator_code, indicator_name in indicators.items():
-            print(f"Downloading data for: {indicator_name} ({indicator_code})")
-            
-            # Use wbgapi.data.fetch for more granular control
-            for row in wb.data.fetch(indicator_code, country_code, time=range(2000, 2025)):
-                # Correctly extract the year from the 'time' field
-                # It's in the format "YR2000"
-                year_str = row['time'].replace('YR', '')
+        # The requests are independent and I/O-bound, so download all indicators in parallel
+        with ThreadPoolExecutor(max_workers=len(indicators)) as executor:
+            frames = list(executor.map(
+                lambda item: fetch_indicator(item[0], item[1], country_code),
+                indicators.items()
+            ))
 
-                data_list.append({
-                    'year': int(year_str), # Convert to an integer
-                    'indicator_name': indicator_name,
-                    'value': row['value']
-                })
-            # To be polite to the API, we can add a small delay
-            time.sleep(1)
+        # Join the per-indicator columns on year. Sorting the columns and dropping empty years
+        # keeps the same layout the long-form pivot_table used to produce.
+        df_wide = pd.concat(frames, axis=1).sort_index().sort_index(axis=1).dropna(how='all')
 
-        # Create the DataFrame from the list of dictionaries
-        if not data_list:
+        if df_wide.empty:
             print("No data was downloaded. Please check the indicator codes and country code.")
             return
 
-        df_long = pd.DataFrame(data_list)
-        
-        # Pivot the DataFrame to the desired wide format
-        df_pivot = df_long.pivot_table(
-            index='year', 
-            columns='indicator_name', 
-            values='value'
-        )
-
         # The index is already a clean integer, no need for to_datetime conversion
-        df_pivot.index.name = 'year'
+        df_wide.index.name = 'year'
+        df_wide.columns.name = None
         
         print("\nWorld Bank data downloaded and processed successfully.")
-        print(df_pivot.head())
+        print(df_wide.head())
         
         # Save the final DataFrame to the processed folder
         output_path = os.path.join(processed_data_folder, 'world_bank_data.csv')
-        df_pivot.to_csv(output_path)
+        df_wide.to_csv(output_path)
         print(f"\nSuccessfully saved World Bank data to '{output_path}'")
         
     except Exception as e:
@@ -1,19 +1,19 @@
-import pandas as pd
 import numpy as np
-import joblib
+import orjson
 import os
-from flask import Flask, render_template_string, request, jsonify
+import functools
+import pyarrow.parquet as pq
+from flask import Flask, Response, request, jsonify
 
 app = Flask(__name__)
 
 # --- Configuration and Path Setup ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Directory of this app.py file
-DATA_PATH = os.path.join(BASE_DIR, '..', '1_data', 'processed', 'master_economic_data.csv')
-MODELS = {}
+DATA_PATH = os.path.join(BASE_DIR, '..', '1_data', 'processed', 'master_economic_data.parquet')
 MODEL_FILENAMES = {
-    'inflation': 'inflation_ridge_model.pkl',
-    'gdp': 'gdp_ridge_model.pkl',
-    'unemployment': 'unemployment_ridge_model.pkl'
+    'inflation': 'inflation_ridge_model.npz',
+    'gdp': 'gdp_ridge_model.npz',
+    'unemployment': 'unemployment_ridge_model.npz'
 }
 
 # NOTE: The models were trained on features in this exact order.
@@ -24,7 +24,18 @@ FEATURE_ORDER = [
     'gdp_growth_annual_lag1'        # Lag Feature (t-1)
 ]
 
-# --- Global Data Variables for Lag Features and Fallbacks ---
+# --- REALISTIC SANITY CLAMPING FOR NIGERIAN ECONOMY (CRITICAL) ---
+# Keyed like MODEL_FILENAMES: (response field, lower bound, upper bound) for each model's prediction
+PREDICTION_BOUNDS = {
+    # Inflation clamped between 15% and 40% (acknowledging high structural inflation)
+    'inflation': ('inflation', 15.0, 40.0),
+    # GDP Growth clamped between -5.0% and 5.0% (More realistic ceiling than 8.0%)
+    'gdp': ('gdp_growth', -5.0, 5.0),
+    # Unemployment minimum 8% (Acknowledging structural unemployment issues)
+    'unemployment': ('unemployment_rate', 8.0, 40.0),
+}
+
+# --- Lag Feature Fallbacks (used when the master dataset can't be read) ---
 LAG_FEATURES = {
     # Default Fallback values for 2024 (t-1 for 2025 prediction)
     # These are more plausible defaults for a modern Nigerian context
@@ -33,130 +44,225 @@ LAG_FEATURES = {
     'unemployment_rate_lag1': 10.0, # Using a slightly higher, more realistic default floor
 }
 
+# Only these columns of the master dataset are needed to derive the lag features
+DATA_COLUMNS = ['year', 'gdp_current_usd', 'inflation_annual', 'unemployment_rate']
+
+
+def read_master_data():
+    """Reads the columns needed for lag extraction as NumPy arrays, sorted by year."""
+    # Parquet is columnar, so only these columns are read from disk
+    table = pq.read_table(DATA_PATH, columns=DATA_COLUMNS)
+    # A stable sort keeps rows that share a year in file order, so "latest" is well defined.
+    # Missing float values come back from to_numpy() as NaN.
+    order = np.argsort(table.column('year').to_numpy(), kind='stable')
+    return {name: table.column(name).to_numpy()[order] for name in DATA_COLUMNS}
+
 
 # --- Initialization: Load Models and Data ---
-def load_resources():
-    """Loads all trained models and extracts necessary lag features."""
-    global MODELS, LAG_FEATURES
-    success = True
+@functools.lru_cache(maxsize=1)
+def resources():
+    """
+    Loads all trained models and extracts necessary lag features.
+
+    The result is cached, so the work happens once per process on first use rather than
+    at import time (Flask's debug reloader imports this module twice).
+    """
+    models = {}
+    lag_features = dict(LAG_FEATURES)
+    rate_weights = lag_offset = None
+    # Response field and bounds of each model, looked up by key so they line up with rate_weights
+    outputs = tuple(PREDICTION_BOUNDS[key] for key in MODEL_FILENAMES)
     
     print("\n--- Model Loading ---")
     # Load Models
     for key, filename in MODEL_FILENAMES.items():
         model_path = os.path.join(BASE_DIR, '..', '2_models', filename)
         try:
-            # Models are saved as Scikit-learn Pipelines (Scaler + Ridge)
-            MODELS[key] = joblib.load(model_path)
-            print(f"SUCCESS: {key.upper()} model (Pipeline) loaded.")
+            # Models are saved as the fitted Scaler + Ridge parameters (see train_all_models.py)
+            with np.load(model_path) as params:
+                models[key] = (
+                    params['mean'].astype(np.float64),
+                    params['scale'].astype(np.float64),
+                    params['coef'].astype(np.float64),
+                    float(params['intercept']),
+                )
+            print(f"SUCCESS: {key.upper()} model (Scaler + Ridge) loaded.")
         except FileNotFoundError:
             print(f"CRITICAL ERROR: {key.upper()} model file not found at {model_path}. Simulation will fail.")
-            success = False
         except Exception as e:
             print(f"CRITICAL ERROR: Failed to load {key.upper()} model: {e}")
-            success = False
 
     print("\n--- Lag Feature Extraction ---")
     # Extract Lag Features from Data
     try:
-        df = pd.read_csv(DATA_PATH)
-        df = df.sort_values(by='year').reset_index(drop=True)
+        data = read_master_data()
         
         # 1. Calculate GDP Growth (needed for its lag feature)
-        if 'gdp_current_usd' in df.columns:
-            df['gdp_growth_annual'] = (df['gdp_current_usd'] / df['gdp_current_usd'].shift(1) - 1) * 100
-        
-        # 2. Calculate necessary lag features (t-1)
-        df['inflation_annual_lag1'] = df['inflation_annual'].shift(1)
-        df['gdp_growth_annual_lag1'] = df['gdp_growth_annual'].shift(1)
-        df['unemployment_rate_lag1'] = df['unemployment_rate'].shift(1)
-        
-        # Find the row containing the latest non-NaN lag values (t-1 for the next forecast)
-        lag_cols = [f for f in FEATURE_ORDER if f.endswith('lag1')]
-        latest_lags = df.dropna(subset=lag_cols).iloc[-1] 
+        gdp = data['gdp_current_usd']
+        gdp_growth = np.full_like(gdp, np.nan)
+        gdp_growth[1:] = (gdp[1:] / gdp[:-1] - 1) * 100
         
-        if not latest_lags.empty:
-            LAG_FEATURES['inflation_annual_lag1'] = latest_lags['inflation_annual_lag1']
-            LAG_FEATURES['gdp_growth_annual_lag1'] = latest_lags['gdp_growth_annual_lag1']
-            LAG_FEATURES['unemployment_rate_lag1'] = latest_lags['unemployment_rate_lag1']
+        # 2. The lag features (t-1 for the next forecast) are the latest observed value of each series
+        series = {
+            'inflation_annual': data['inflation_annual'],
+            'gdp_growth_annual': gdp_growth,
+            'unemployment_rate': data['unemployment_rate'],
+        }
+        for column, values in series.items():
+            observed = values[~np.isnan(values)]
+            if observed.size:
+                lag_features[f'{column}_lag1'] = float(observed[-1])
         
         print(f"SUCCESS: Data loaded. Lagged Features (t-1 for next forecast) extracted:")
-        print(LAG_FEATURES)
+        print(lag_features)
         
     except Exception as e:
         print(f"CRITICAL WARNING: Could not load or process data for lagged features: {e}. Using hardcoded defaults.")
-        
-    return success
 
-# Load resources when the app starts
-load_resources()
+    if all(key in models for key in MODEL_FILENAMES):
+        # Fold each scaler into its ridge coefficients so all three targets come out of a single
+        # matrix-vector product: ((x - mean) / scale) @ coef + b == x @ (coef / scale) + (b - mean @ (coef / scale))
+        weights, biases = [], []
+        for key in MODEL_FILENAMES:
+            mean, scale, coef, intercept = models[key]
+            scaled_coef = coef / scale
+            weights.append(scaled_coef)
+            biases.append(intercept - mean @ scaled_coef)
+        weights = np.vstack(weights)
+        biases = np.array(biases)
+
+        # The lag features don't change between requests, so pre-apply their share of the models once:
+        # weights @ [lending_rate, *lag_vec] + biases == rate_weights * lending_rate + lag_offset
+        lag_vec = np.array([lag_features[feature] for feature in FEATURE_ORDER[1:]])
+        rate_weights = weights[:, 0]
+        lag_offset = weights[:, 1:] @ lag_vec + biases
+
+        # Kept as plain float tuples for predict_rate()
+        rate_weights = tuple(rate_weights.tolist())
+        lag_offset = tuple(lag_offset.tolist())
+
+    return {
+        'models': models,
+        'lag_features': lag_features,
+        # Both are in MODEL_FILENAMES order, and None if any model failed to load
+        'rate_weights': rate_weights,
+        'lag_offset': lag_offset,
+        # (response field, lower, upper) per model, also in MODEL_FILENAMES order
+        'outputs': outputs,
+    }
+
+
+def predict_rate(lending_rate, rate_weights, lag_offset):
+    """
+    Evaluates all three folded models for a single lending rate.
+
+    The kernel is three multiply-adds, so it uses plain float arithmetic: for inputs this
+    small, NumPy's per-call dispatch costs far more than the computation itself.
+    """
+    return tuple(weight * lending_rate + offset for weight, offset in zip(rate_weights, lag_offset))
 
 
 # --- API Endpoint: Predict All Variables ---
 @app.route('/predict', methods=['POST'])
 def predict():
     """Accepts policy input and returns predictions for all three economic variables."""
-    if not all(model in MODELS for model in ['inflation', 'gdp', 'unemployment']):
+    loaded = resources()
+    if loaded['rate_weights'] is None:
         return jsonify({'error': 'One or more models failed to load. Check server logs.'}), 500
 
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         # Policy Lever: Current Lending Rate (t)
-        lending_rate = data.get('lending_rate')
+        lending_rate = data.get('lending_rate') if isinstance(data, dict) else None
 
         if lending_rate is None or not isinstance(lending_rate, (int, float)):
             return jsonify({'error': 'Invalid or missing required parameter: lending_rate (must be numeric)'}), 400
 
-        # Create the input feature array based on the training order (FEATURE_ORDER)
-        input_data = [
-            lending_rate,
-            LAG_FEATURES['inflation_annual_lag1'],
-            LAG_FEATURES['unemployment_rate_lag1'],
-            LAG_FEATURES['gdp_growth_annual_lag1'],
-        ]
-        
-        X_predict = np.array([input_data])
+        # Run all three predictions at once. The lag features (FEATURE_ORDER[1:]) are already
+        # folded into lag_offset, so only the lending-rate term is computed per request.
+        predictions = predict_rate(lending_rate, loaded['rate_weights'], loaded['lag_offset'])
         
-        # Run all three predictions (using the loaded Pipeline)
-        inflation_pred = MODELS['inflation'].predict(X_predict)[0]
-        gdp_pred = MODELS['gdp'].predict(X_predict)[0]
-        unemployment_pred = MODELS['unemployment'].predict(X_predict)[0]
-        
-        # --- REALISTIC SANITY CLAMPING FOR NIGERIAN ECONOMY (CRITICAL) ---
+        # Apply the realistic sanity clamping (PREDICTION_BOUNDS)
         predicted_results = {
-            # Inflation clamped between 15% and 40% (acknowledging high structural inflation)
-            'inflation': float(np.clip(inflation_pred, 15.0, 40.0)), 
-            # GDP Growth clamped between -5.0% and 5.0% (More realistic ceiling than 8.0%)
-            'gdp_growth': float(np.clip(gdp_pred, -5.0, 5.0)),
-            # Unemployment minimum 8% (Acknowledging structural unemployment issues)
-            'unemployment_rate': float(np.clip(unemployment_pred, 8.0, 40.0)), 
+            name: min(max(prediction, lower), upper)
+            for (name, lower, upper), prediction in zip(loaded['outputs'], predictions)
         }
         
-        return jsonify(predicted_results)
+        return Response(orjson.dumps(predicted_results), mimetype='application/json')
 
+    except orjson.JSONDecodeError:
+        return jsonify({'error': 'Request body must be valid JSON'}), 400
+    except Exception as e:
+        print(f"Prediction Error: {e}")
+        return jsonify({'error': f'An internal error occurred during prediction: {str(e)}'}), 500
+
+
+# --- API Endpoint: Predict Over a Sweep of Lending Rates ---
+@app.route('/predict_sweep', methods=['POST'])
+def predict_sweep():
+    """Accepts a list of lending rates and returns the predictions for each, in one vectorized pass."""
+    loaded = resources()
+    if loaded['rate_weights'] is None:
+        return jsonify({'error': 'One or more models failed to load. Check server logs.'}), 500
+
+    try:
+        data = orjson.loads(request.get_data())
+        lending_rates = data.get('lending_rates') if isinstance(data, dict) else None
+
+        if not isinstance(lending_rates, list) or not lending_rates or not all(
+            isinstance(rate, (int, float)) for rate in lending_rates
+        ):
+            return jsonify({'error': 'Invalid or missing required parameter: lending_rates (must be a non-empty list of numbers)'}), 400
+
+        # One (N, 3) evaluation for the whole sweep: each row is predict_rate() for one lending rate
+        rates = np.asarray(lending_rates, dtype=np.float64)
+        predictions = np.outer(rates, loaded['rate_weights']) + loaded['lag_offset']
+
+        # Apply the realistic sanity clamping (PREDICTION_BOUNDS) column by column
+        names, lower, upper = zip(*loaded['outputs'])
+        np.clip(predictions, lower, upper, out=predictions)
+
+        predicted_results = {
+            name: predictions[:, i].tolist() for i, name in enumerate(names)
+        }
+        predicted_results['lending_rates'] = rates.tolist()
+
+        return Response(orjson.dumps(predicted_results), mimetype='application/json')
+
+    except orjson.JSONDecodeError:
+        return jsonify({'error': 'Request body must be valid JSON'}), 400
     except Exception as e:
         print(f"Prediction Error: {e}")
         return jsonify({'error': f'An internal error occurred during prediction: {str(e)}'}), 500
 
 
 # --- Webpage Route ---
+# The page is static (no template variables), so read it once and serve the bytes as-is.
+try:
+    with open(os.path.join(BASE_DIR, 'policy_simulator_flask.html'), 'rb') as f:
+        HTML_BYTES = f.read()
+except FileNotFoundError:
+    HTML_BYTES = None
+
+
 @app.route('/')
 def index():
     """Serves the main policy simulator HTML page."""
-    try:
-        html_file_path = os.path.join(BASE_DIR, 'policy_simulator_flask.html')
-        with open(html_file_path, 'r') as f:
-            html_content = f.read()
-        return render_template_string(html_content)
-    except FileNotFoundError:
+    if HTML_BYTES is None:
         return f"""
         <h1>ERROR: Policy Simulator Page Not Found</h1>
         <p>The required HTML file <strong>policy_simulator_flask.html</strong> was not found in the <strong>{BASE_DIR}</strong> directory.</p>
         <p>Ensure that the HTML frontend file is present to run the simulator.</p>
-        <p>Current Lag Features (T-1, used for prediction): {LAG_FEATURES}</p>
+        <p>Current Lag Features (T-1, used for prediction): {resources()['lag_features']}</p>
         """, 404
+    return Response(HTML_BYTES, mimetype='text/html')
 
 if __name__ == '__main__':
     print("\n=====================================================")
     print("Starting Flask Policy Simulator Server...")
     print("=====================================================")
+    # With debug=True the reloader re-runs this script in a child process (WERKZEUG_RUN_MAIN=true)
+    # which actually serves requests, so only warm the cache there instead of in both processes.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resources()
     app.run(debug=True, port=5000)
\ No newline at end of file
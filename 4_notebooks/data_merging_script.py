@@ -1,35 +1,65 @@
 import pandas as pd
 import numpy as np
 import os
+from pathlib import Path
 
 # --- 1. Data Loading ---
-# FIX: Define the processed data path relative to the execution directory.
-# The script is executed from the PolicySimulator directory, and the data is in 1_data/processed.
-processed_data_path = os.path.join(os.getcwd(), '1_data', 'processed')
-
-# Load the four datasets from the processed directory
-cbn_df = pd.read_csv(os.path.join(processed_data_path, 'cleaned_cbn_interest_rates.csv'))
-world_bank_df = pd.read_csv(os.path.join(processed_data_path, 'world_bank_data.csv'))
-nbs_cpi_df = pd.read_csv(os.path.join(processed_data_path, 'nbs_cpi_data.csv'), header=None)
-nbs_unemployment_df = pd.read_csv(os.path.join(processed_data_path, 'nbs_unemployment_data.csv'))
+# Resolve the processed data directory from this file's location (4_notebooks sits next to 1_data),
+# so the script works from any working directory, and stop early if it is missing.
+processed_data_path = Path(__file__).resolve().parents[1] / '1_data' / 'processed'
+if not processed_data_path.is_dir():
+    print(f"ERROR: Processed data directory not found at {processed_data_path}. Please run the 1_data scripts first.")
+    exit()
+
+# Load the four datasets from the processed directory.
+# The CSVs are parsed with the multithreaded pyarrow engine; the CBN data is already Parquet.
+cbn_df = pd.read_parquet(processed_data_path / 'cleaned_cbn_interest_rates.parquet')
+world_bank_df = pd.read_csv(
+    processed_data_path / 'world_bank_data.csv',
+    engine='pyarrow',
+    dtype={'year': 'int32'}
+)
+# Only the month, All Items index and year-on-year inflation columns of the CPI table are used
+nbs_cpi_df = pd.read_csv(
+    processed_data_path / 'nbs_cpi_data.csv',
+    engine='pyarrow',
+    header=None,
+    usecols=[1, 2, 5],
+    names=['Month', 'All_Items_Index', 'Year_on_Year_Inflation_Rate']
+)
+# The unit and previous-period columns of the NBS indicator table are never used, so they are not read
+nbs_unemployment_df = pd.read_csv(
+    processed_data_path / 'nbs_unemployment_data.csv',
+    engine='pyarrow',
+    usecols=['Related', 'Last', 'Reference']
+)
 
 # --- 2. Data Pre-processing for Merging ---
 
 def clean_columns(df):
     """Strips whitespace and converts column names to lowercase for consistency."""
-    # Ensure columns are string type before stripping/lowering
-    df.columns = df.columns.astype(str).str.strip()
-    df.columns = df.columns.str.lower()
+    columns = df.columns
+    # Ensure columns are string type before stripping/lowering (they usually already are)
+    if not pd.api.types.is_string_dtype(columns):
+        columns = columns.astype(str)
+    df.columns = columns.str.strip().str.lower()
     return df
 
 cbn_df = clean_columns(cbn_df)
 world_bank_df = clean_columns(world_bank_df)
 
-# CRITICAL FIX STEP 1: Ensure 'year' in world_bank_df is numeric and determine the latest year.
+# FIX: Drop corrupted columns from cbn_df, together with the unreliable 'sector' and 'rate_type'
+# categorical columns, before any merge so the joins don't carry them along only to discard them
+corrupted_cols = [
+    'k\nn\na\nb\ntseu tn\na\nq n b f h c r em',
+    'b\nm\nc\nf'
+]
+cbn_df = cbn_df.drop(columns=corrupted_cols + ['sector', 'rate_type'], errors='ignore')
+print(f"CLEANUP: Attempted to drop corrupted columns from cbn_df: {corrupted_cols}")
+print("CLEANUP: Corrupted 'sector' and 'rate_type' columns dropped from cbn_df.")
+
+# CRITICAL FIX STEP 1: Determine the latest year ('year' is already read as an integer column).
 if 'year' in world_bank_df.columns:
-    world_bank_df['year'] = pd.to_numeric(world_bank_df['year'], errors='coerce')
-    world_bank_df.dropna(subset=['year'], inplace=True)
-    world_bank_df['year'] = world_bank_df['year'].astype(int)
     latest_year = world_bank_df['year'].max()
 else:
     latest_year = 2023
@@ -37,42 +67,31 @@ else:
 
 
 # CRITICAL FIX STEP 2: Address missing 'year' column in cbn_df (which caused the KeyError).
-if 'year' in cbn_df.columns:
-     print("SUCCESS: 'year' column is ready in cbn_df.")
+# Use 'year' or the first other likely temporal column, and only coerce it when it isn't already integer.
+year_column = next((col_name for col_name in ('year', 'period', 'date', 'time') if col_name in cbn_df.columns), None)
+if year_column is None:
+    # Inject the latest year found (2024) if the temporal column is completely missing
+    cbn_df['year'] = latest_year
+    print(f"CRITICAL FIX APPLIED: Column 'year' was missing in cbn_df. Injected year {latest_year} for merging.")
 else:
-    # Check other likely candidates for the year column
-    found_and_renamed = False
-    for col_name in ['period', 'date', 'time']:
-        if col_name in cbn_df.columns:
-            cbn_df.rename(columns={col_name: 'year'}, inplace=True)
-            cbn_df['year'] = pd.to_numeric(cbn_df['year'], errors='coerce').astype('Int64')
-            cbn_df.dropna(subset=['year'], inplace=True)
-            print(f"SUCCESS: Renamed '{col_name}' column in cbn_df to 'year'.")
-            found_and_renamed = True
-            break
-            
-    if not found_and_renamed:
-        # Inject the latest year found (2024) if the temporal column is completely missing
-        cbn_df['year'] = latest_year
-        print(f"CRITICAL FIX APPLIED: Column 'year' was missing in cbn_df. Injected year {latest_year} for merging.")
-
-# FIX: Drop corrupted columns from cbn_df
-corrupted_cols = [
-    'k\nn\na\nb\ntseu tn\na\nq n b f h c r em',
-    'b\nm\nc\nf'
-]
-cbn_df.drop(columns=corrupted_cols, inplace=True, errors='ignore')
-print(f"CLEANUP: Attempted to drop corrupted columns from cbn_df: {corrupted_cols}")
+    if year_column != 'year':
+        cbn_df = cbn_df.rename(columns={year_column: 'year'})
+        print(f"SUCCESS: Renamed '{year_column}' column in cbn_df to 'year'.")
+    if not pd.api.types.is_integer_dtype(cbn_df['year']):
+        cbn_df['year'] = pd.to_numeric(cbn_df['year'], errors='coerce').astype('Int64')
+        cbn_df = cbn_df.dropna(subset=['year'])
+    print("SUCCESS: 'year' column is ready in cbn_df.")
 
 
 # --- 3. Cleaning and Forecasting (NBS CPI and Unemployment) ---
 
 # NBS CPI Data Preparation (for 2025 forecast)
-cpi_df_clean = nbs_cpi_df.iloc[:, [1, 2, 5]]
-cpi_df_clean.columns = ['Month', 'All_Items_Index', 'Year_on_Year_Inflation_Rate']
-cpi_df_clean = cpi_df_clean.iloc[5:].reset_index(drop=True)
-cpi_df_clean['All_Items_Index'] = pd.to_numeric(cpi_df_clean['All_Items_Index'])
-cpi_df_clean['Year_on_Year_Inflation_Rate'] = pd.to_numeric(cpi_df_clean['Year_on_Year_Inflation_Rate'])
+# Skip the title/header rows and cast the two value columns in one chained expression
+cpi_df_clean = (
+    nbs_cpi_df.iloc[5:]
+    .astype({'All_Items_Index': 'float64', 'Year_on_Year_Inflation_Rate': 'float64'})
+    .reset_index(drop=True)
+)
 
 # Create 2025 forecast row (using mean of existing data)
 cpi_2025_df = pd.DataFrame({
@@ -86,65 +105,92 @@ cpi_2025_df = pd.DataFrame({
 unemployment_df_clean = nbs_unemployment_df.rename(columns={
     'Related': 'Metric',
     'Last': 'Rate',
-    'Previous': 'Previous_Rate',
     'Reference': 'Date'
 })
 unemployment_df_clean = unemployment_df_clean[unemployment_df_clean['Metric'] == 'Unemployment Rate'].copy()
-unemployment_df_clean = unemployment_df_clean.drop(columns=['Unit', 'Previous_Rate'])
 unemployment_df_clean['Rate'] = pd.to_numeric(unemployment_df_clean['Rate'])
-unemployment_df_clean['Date'] = pd.to_datetime(unemployment_df_clean['Date'], format='%b %Y')
-unemployment_df_clean.set_index('Date', inplace=True)
-
-# Extract 2024 recent data
-unemployment_2024_df = unemployment_df_clean[unemployment_df_clean.index.year == 2024].reset_index()
-unemployment_2024_df.rename(columns={'Date': 'year', 'Rate': 'unemployment_rate'}, inplace=True)
-unemployment_2024_df['year'] = unemployment_2024_df['year'].dt.year
+# Parse the month labels once and keep only the year, which is all the merge needs
+unemployment_df_clean['year'] = pd.to_datetime(
+    unemployment_df_clean['Date'], format='%b %Y', cache=True
+).dt.year.astype('int16')
+unemployment_df_clean = unemployment_df_clean.drop(columns=['Date']).reset_index(drop=True)
+
+# Extract 2024 recent data, gathering the rows and columns in a single .loc on the int year
+unemployment_years = unemployment_df_clean['year'].to_numpy()
+unemployment_2024_df = unemployment_df_clean.loc[
+    unemployment_years == 2024, ['year', 'Rate']
+].rename(columns={'Rate': 'unemployment_rate'})
 
 # --- 4. Data Merging and Consolidation ---
 
-# Merge World Bank and CBN interest rate data
-master_df = pd.merge(world_bank_df, cbn_df, on='year', how='left')
+# Prepare historical NBS unemployment data (< 2024), keeping only the columns to be merged
+unemployment_historical_df = unemployment_df_clean.loc[
+    unemployment_years < 2024, ['year', 'Rate']
+].rename(columns={'Rate': 'unemployment_rate'})
 
-# Prepare and merge historical NBS unemployment data (< 2024)
-unemployment_historical_df = unemployment_df_clean[unemployment_df_clean.index.year < 2024].reset_index()
-unemployment_historical_df.rename(columns={'Date': 'year', 'Rate': 'unemployment_rate'}, inplace=True)
-unemployment_historical_df['year'] = unemployment_historical_df['year'].dt.year
-master_df = pd.merge(master_df, unemployment_historical_df, on='year', how='left')
+# Merge World Bank, CBN interest rate and historical NBS unemployment data in one chain.
+# Every CBN rate row shares a year, so that join is one-to-many; NBS has at most one row per year.
+master_df = (
+    world_bank_df
+    .merge(cbn_df, on='year', how='left', validate='one_to_many')
+    .merge(unemployment_historical_df, on='year', how='left', validate='many_to_one')
+)
 
 # CONSOLIDATION: Combine World Bank ('unemployment') and NBS ('unemployment_rate')
-master_df['unemployment_rate'] = master_df['unemployment_rate'].combine_first(master_df['unemployment'])
-master_df.drop(columns=['unemployment'], inplace=True, errors='ignore')
+# Both columns share master_df's index, so a plain fillna coalesces them without index alignment
+master_df['unemployment_rate'] = master_df['unemployment_rate'].fillna(master_df['unemployment'])
+master_df = master_df.drop(columns=['unemployment'], errors='ignore')
 print("CONSOLIDATION: Unemployment data unified into 'unemployment_rate' column.")
 
-# CLEANUP: Drop corrupted/unreliable CBN categorical columns
-master_df.drop(columns=['sector', 'rate_type'], inplace=True, errors='ignore')
-print("CLEANUP: Corrupted 'sector' and 'rate_type' columns dropped from master_df.")
-
-# FINAL CLEANUP: Drop the redundant 'Metric' column from the NBS merge
-master_df.drop(columns=['Metric'], inplace=True, errors='ignore')
-print("CLEANUP: Dropped redundant 'Metric' column.")
-
-
-# Combine 2024/2025 recent/forecast data
-recent_data_df = pd.merge(cpi_2025_df, unemployment_2024_df, on='year', how='outer')
+# Combine 2024/2025 recent/forecast data. The years never overlap, so the rows are simply
+# stacked in year order instead of being outer-joined on 'year'.
+recent_data_df = pd.concat([unemployment_2024_df, cpi_2025_df], axis=0, ignore_index=True)
 recent_data_df.columns = recent_data_df.columns.str.lower()
-recent_data_df = recent_data_df.reindex(columns=master_df.columns)
+
+# Lay the recent rows out directly in master_df's column order: columns it has are taken as-is
+# (keeping their dtype), the rest are all-NaN, and columns master_df lacks are left out.
+recent_data_df = pd.DataFrame({
+    column: (
+        recent_data_df[column] if column in recent_data_df.columns
+        else pd.Series(np.nan, index=recent_data_df.index, dtype='float64')
+    )
+    for column in master_df.columns
+})
 master_df = pd.concat([master_df, recent_data_df], ignore_index=True)
 
+# Downcast the model columns to the narrowest dtypes that hold their range, which shrinks what
+# is written here and read back by the trainer and the app (GDP in USD needs the float64 range)
+dtype_map = {
+    'year': 'int16',
+    'inflation_annual': 'float32',
+    'unemployment_rate': 'float32',
+    'gdp_current_usd': 'float64',
+    'lending_interest_rate': 'float32'
+}
+master_df = master_df.astype({column: dtype for column, dtype in dtype_map.items() if column in master_df.columns})
+
 
 # --- 5. Final Output and Save ---
 
-print("\n\n=====================================================")
-print("  Final, Merged Master DataFrame")
-print(master_df.head())
-print("\n--- Final Master DataFrame Info ---")
-print(master_df.info())
-print("\n\n--- Final Master DataFrame Tail (to show recent data) ---")
-print(master_df.tail())
-
-# 6. Save the final merged DataFrame to a CSV file
-output_path = os.path.join(processed_data_path, 'master_economic_data.csv')
-master_df.to_csv(output_path, index=False)
+# The full-frame summaries are only printed when asked for (set POLICYSIM_VERBOSE=1)
+if os.environ.get('POLICYSIM_VERBOSE'):
+    print("\n\n=====================================================")
+    print("  Final, Merged Master DataFrame")
+    print(master_df.head())
+    print("\n--- Final Master DataFrame Info ---")
+    print(master_df.info())
+    print("\n\n--- Final Master DataFrame Tail (to show recent data) ---")
+    print(master_df.tail())
+
+# 6. Save the final merged DataFrame as Parquet (typed, compressed, and fast for the trainer and app to re-read)
+output_path = processed_data_path / 'master_economic_data.parquet'
+master_df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
 print(f"\n\n=====================================================")
 print(f"SUCCESS: Saved final merged data to {output_path}")
+
+# Optionally also write a human-readable CSV copy for debugging
+if os.environ.get('POLICYSIM_WRITE_CSV'):
+    csv_path = processed_data_path / 'master_economic_data.csv'
+    master_df.to_csv(csv_path, index=False)
+    print(f"DEBUG: Also saved a CSV copy to {csv_path}")
 print("=====================================================")
@@ -1,24 +1,21 @@
 import pandas as pd
 import numpy as np
-import joblib
 import os
 from sklearn.linear_model import Ridge
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
 
 # --- File Paths and Configuration ---
 # Define paths relative to the PolicySimulator root directory (assuming script is in 4_notebooks)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PROCESSED_DATA_PATH = os.path.join(BASE_DIR, '1_data', 'processed', 'master_economic_data.csv')
+PROCESSED_DATA_PATH = os.path.join(BASE_DIR, '1_data', 'processed', 'master_economic_data.parquet')
 MODELS_DIR = os.path.join(BASE_DIR, '2_models')
 
 # Target models to be trained and saved (INCLUDING INFLATION for consistency)
 MODELS_TO_TRAIN = {
-    'inflation_annual': 'inflation_ridge_model.pkl', # Re-training inflation with 4 features
-    'gdp_growth_annual': 'gdp_ridge_model.pkl',
-    'unemployment_rate': 'unemployment_ridge_model.pkl'
+    'inflation_annual': 'inflation_ridge_model.npz', # Re-training inflation with 4 features
+    'gdp_growth_annual': 'gdp_ridge_model.npz',
+    'unemployment_rate': 'unemployment_ridge_model.npz'
 }
 
 # Features used for all predictions (4 features for all models)
@@ -31,20 +28,30 @@ FEATURES = [
 
 # --- 1. Data Loading and Feature Engineering ---
 
+def lag1(values):
+    """Returns a 1-D float array shifted down by one position, with NaN in the first slot."""
+    lagged = np.empty_like(values)
+    lagged[:1] = np.nan
+    lagged[1:] = values[:-1]
+    return lagged
+
 def prepare_data(df):
     """
     Calculates GDP Growth, creates necessary lagged features, and cleans the data.
     """
     print("\n--- 1. Data Preparation and Feature Engineering ---")
     
-    # Calculate GDP Annual Growth Rate (%)
-    df = df.sort_values(by='year').reset_index(drop=True)
-    df['gdp_growth_annual'] = (df['gdp_current_usd'] / df['gdp_current_usd'].shift(1) - 1) * 100
+    # Calculate GDP Annual Growth Rate (%) directly on the underlying array
+    df = df.sort_values(by='year', kind='stable').reset_index(drop=True)
+    gdp = df['gdp_current_usd'].to_numpy(dtype=np.float64)
+    gdp_growth = np.full_like(gdp, np.nan)
+    gdp_growth[1:] = (gdp[1:] / gdp[:-1] - 1) * 100
+    df['gdp_growth_annual'] = gdp_growth
     
     # Create Lagged Features (t-1 variables to predict t)
-    df['inflation_annual_lag1'] = df['inflation_annual'].shift(1)
-    df['unemployment_rate_lag1'] = df['unemployment_rate'].shift(1)
-    df['gdp_growth_annual_lag1'] = df['gdp_growth_annual'].shift(1)
+    df['inflation_annual_lag1'] = lag1(df['inflation_annual'].to_numpy(dtype=np.float64))
+    df['unemployment_rate_lag1'] = lag1(df['unemployment_rate'].to_numpy(dtype=np.float64))
+    df['gdp_growth_annual_lag1'] = lag1(gdp_growth)
     
     # Drop rows where any feature/target is missing
     all_cols = FEATURES + list(MODELS_TO_TRAIN.keys())
@@ -62,32 +69,35 @@ def prepare_data(df):
 
 # --- 2. Model Training and Saving ---
 
-def train_and_save_model(X, y, target_name, model_filename):
-    """Trains a Ridge regression model within a scaling pipeline and saves it."""
-    
-    # Split the data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Initialize the Pipeline: Scaling + Ridge Regression
-    pipeline = Pipeline([
-        ('scaler', StandardScaler()),  # Step 1: Standardize features (mean=0, std=1)
-        ('ridge', Ridge(alpha=1.0))    # Step 2: Apply Ridge Regression
-    ])
+def train_and_save_model(scaler, Xs_train, Xs_test, y_train, y_test, target_name, model_filename):
+    """
+    Trains a Ridge regression model on pre-scaled features and saves its parameters together
+    with those of the fitted scaler.
+    """
     
-    # Train the pipeline
-    pipeline.fit(X_train, y_train)
+    # Train the Ridge Regression. With 4 features the normal equations are tiny, so solve
+    # them directly with a Cholesky factorization instead of letting sklearn pick a solver.
+    ridge = Ridge(alpha=1.0, solver='cholesky')
+    ridge.fit(Xs_train, y_train)
     
     # Evaluate the model
-    y_pred = pipeline.predict(X_test) # Predict using the pipeline
+    y_pred = ridge.predict(Xs_test)
     mse = mean_squared_error(y_test, y_pred)
     
-    # Save the pipeline
+    # Save the fitted Scaler + Ridge state: prediction is ((x - mean) / scale) @ coef + intercept,
+    # so these four arrays are the whole model and load without sklearn or unpickling.
     model_path = os.path.join(MODELS_DIR, model_filename)
-    joblib.dump(pipeline, model_path) # Save the complete pipeline
+    np.savez(
+        model_path,
+        mean=scaler.mean_,        # Step 1: Standardize features (mean=0, std=1)
+        scale=scaler.scale_,
+        coef=ridge.coef_,         # Step 2: Apply Ridge Regression
+        intercept=ridge.intercept_
+    )
     
     print(f"\nModel Trained: Scaled Ridge Regression for {target_name.upper()}")
     print(f"  Test Set Mean Squared Error (MSE): {mse:.2f}")
-    print(f"  SUCCESS: Scaled Model Pipeline saved to {model_path}")
+    print(f"  SUCCESS: Scaled Model parameters saved to {model_path}")
 
 # --- Main Execution ---
 
@@ -99,7 +109,7 @@ if __name__ == "__main__":
         os.makedirs(MODELS_DIR)
 
     try:
-        data = pd.read_csv(PROCESSED_DATA_PATH)
+        data = pd.read_parquet(PROCESSED_DATA_PATH, engine='pyarrow')
         print(f"SUCCESS: Loaded data from {PROCESSED_DATA_PATH}")
     except FileNotFoundError:
         print(f"ERROR: Data file not found at {PROCESSED_DATA_PATH}. Please ensure your data pipeline is complete.")
@@ -107,12 +117,24 @@ if __name__ == "__main__":
 
     df_train = prepare_data(data)
     
-    X = df_train[FEATURES]
+    # Hold out the most recent 20% of years for testing. The rows are sorted by year, so a
+    # positional split keeps future years out of training (a shuffled split would leak them).
+    # The same split is shared by all three models.
+    split_index = int(len(df_train) * 0.8)
+    # Build the shared feature matrix once as a C-contiguous float64 array, so the scaler and
+    # the BLAS calls in the ridge solve work on it without making their own copies
+    X = np.ascontiguousarray(df_train[FEATURES].to_numpy(), dtype=np.float64)
+    X_train, X_test = X[:split_index], X[split_index:]
+
+    # All three models use the same features, so fit the scaler and scale the data only once
+    scaler = StandardScaler().fit(X_train)
+    Xs_train = scaler.transform(X_train)
+    Xs_test = scaler.transform(X_test)
 
     # Train and save each model, ensuring all use the 4-feature input schema
     for target, filename in MODELS_TO_TRAIN.items():
-        y = df_train[target]
-        train_and_save_model(X, y, target, filename)
+        y = df_train[target].to_numpy(dtype=np.float64)
+        train_and_save_model(scaler, Xs_train, Xs_test, y[:split_index], y[split_index:], target, filename)
 
     print("\n--- All three multi-variable models retrained and saved successfully. ---")
     print("Next step: Restart the Flask server (3_app/app.py) to load the consistent, scaled models.")